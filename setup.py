@@ -63,15 +63,21 @@ HAS_PYTHON_HEADERS = check_include('python3', 'Python.h')
 HAS_STRINGPREP_HEADERS = check_include('libidn', 'stringprep.h')
 
 ext_modules = None
-if HAS_PYTHON_HEADERS and HAS_STRINGPREP_HEADERS:
+if HAS_PYTHON_HEADERS:
     try:
         from Cython.Build import cythonize
     except ImportError:
-        print('Cython not found, falling back to the slow stringprep module.')
+        print('Cython not found, falling back to the slow pure python modules.')
     else:
-        ext_modules = cythonize('slixmpp/stringprep.pyx')
+        # Plain python module, its .pxd file gives the types to Cython.
+        sources = ['slixmpp/xmlstream/dispatch.py']
+        if HAS_STRINGPREP_HEADERS:
+            sources.append('slixmpp/stringprep.pyx')
+        else:
+            print('Falling back to the slow stringprep module.')
+        ext_modules = cythonize(sources)
 else:
-    print('Falling back to the slow stringprep module.')
+    print('Falling back to the slow pure python modules.')
 
 setup(
     name="slixmpp",
@@ -91,6 +97,7 @@ setup(
         'XEP-0363': ['aiohttp'],
         'XEP-0444 compliance': ['emoji'],
         'Safer XML parsing': ['defusedxml'],
+        'Faster event loop': ['uvloop'],
     },
     classifiers=CLASSIFIERS,
     cmdclass={'test': TestCommand}
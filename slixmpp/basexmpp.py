@@ -9,6 +9,7 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import sys
 
 from typing import (
     Dict,
@@ -75,9 +76,9 @@ class BaseXMPP(XMLStream):
     def __init__(self, jid='', default_ns='jabber:client', **kwargs):
         XMLStream.__init__(self, **kwargs)
 
-        self.default_ns = default_ns
+        self.default_ns = sys.intern(default_ns)
         self.stream_ns = 'http://etherx.jabber.org/streams'
-        self.namespace_map[self.stream_ns] = 'stream'
+        self.namespace_map = {**self.namespace_map, self.stream_ns: 'stream'}
 
         #: An identifier for the stream as given by the server.
         self.stream_id = None
@@ -8,7 +8,8 @@
 import logging
 import time
 import datetime
-from threading import Thread, Lock, Timer
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Timer
 
 from slixmpp.plugins.xep_0323.timerreset import TimerReset
 
@@ -38,6 +39,9 @@ class XEP_0323(BasePlugin):
     Configuration Values:
         threaded -- Indicates if communication with sensors should be threaded.
                     Defaults to True.
+        max_workers -- The maximum number of threads used to communicate
+                    with sensors when threaded. Defaults to None, which
+                    uses the ThreadPoolExecutor default.
 
     Events:
         Sensor side
@@ -103,7 +107,8 @@ class XEP_0323(BasePlugin):
 
 
     default_config = {
-        'threaded': True
+        'threaded': True,
+        'max_workers': None,
     }
 
     def plugin_init(self):
@@ -155,6 +160,10 @@ class XEP_0323(BasePlugin):
 
         self.last_seqnr = 0
         self.seqnr_lock = Lock()
+        # Reuse the same threads for every readout instead of starting
+        # a new one per request
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='Sensordata')
 
         ## For testing only
         self.test_authenticated_from = ""
@@ -185,6 +194,7 @@ class XEP_0323(BasePlugin):
         self.xmpp.remove_handler('Sensordata Event:Cancelled')
         self.xmpp.remove_handler('Sensordata Event:Fields')
         self.xmpp['xep_0030'].del_feature(feature=Sensordata.namespace)
+        self._executor.shutdown(wait=False)
 
 
     # =================================================================
@@ -311,11 +321,7 @@ class XEP_0323(BasePlugin):
                 timer.start()
                 return
 
-            if self.threaded:
-                tr_req = Thread(target=self._threaded_node_request, args=(session, process_fields, req_flags))
-                tr_req.start()
-            else:
-                self._threaded_node_request(session, process_fields, req_flags)
+            self._start_node_request(session, process_fields, req_flags)
 
         else:
             iq = iq.reply()
@@ -324,6 +330,28 @@ class XEP_0323(BasePlugin):
             iq['rejected']['error'] = error_msg
             iq.send()
 
+    def _start_node_request(self, session, process_fields, flags):
+        """
+        Start the device readouts, in a worker thread if threaded.
+
+        Arguments:
+            session         -- The request session id
+            process_fields  -- The fields to request from the devices
+            flags           -- [optional] flags to pass to the devices
+        """
+        if self.threaded:
+            future = self._executor.submit(self._threaded_node_request,
+                                           session, process_fields, flags)
+            future.add_done_callback(self._node_request_done)
+        else:
+            self._threaded_node_request(session, process_fields, flags)
+
+    def _node_request_done(self, future):
+        """ Log errors raised by a threaded readout. """
+        exc = future.exception()
+        if exc is not None:
+            log.error('Sensor readout failed', exc_info=exc)
+
     def _threaded_node_request(self, session, process_fields, flags):
         """
         Helper function to handle the device readouts in a separate thread.
@@ -385,11 +413,7 @@ class XEP_0323(BasePlugin):
         msg['started']['seqnr'] = self.sessions[session]['seqnr']
         msg.send()
 
-        if self.threaded:
-            tr_req = Thread(target=self._threaded_node_request, args=(session, process_fields, req_flags))
-            tr_req.start()
-        else:
-            self._threaded_node_request(session, process_fields, req_flags)
+        self._start_node_request(session, process_fields, req_flags)
 
     def _all_nodes_done(self, session):
         """
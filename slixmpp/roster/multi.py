@@ -71,9 +71,8 @@ class Roster(object):
                     self[sfrom][sto].last_status = stanza
                 else:
                     self[sfrom].last_status = stanza
-                    with self[sfrom]._last_status_lock:
-                        for jid in self[sfrom]:
-                            self[sfrom][jid].last_status = None
+                    for jid in self[sfrom]:
+                        self[sfrom][jid].last_status = None
 
                 if not self.xmpp.sentpresence:
                     self.xmpp.event('sent_presence')
@@ -3,8 +3,6 @@
 # Copyright (C) 2010  Nathanael C. Fritz
 # This file is part of Slixmpp.
 # See the file LICENSE for copying permission.
-import threading
-
 from slixmpp.xmlstream import JID
 from slixmpp.roster import RosterItem
 
@@ -59,7 +57,6 @@ class RosterNode(object):
         self.last_status = None
         self._version = ''
         self._jids = {}
-        self._last_status_lock = threading.Lock()
 
         if self.db:
             if hasattr(self.db, 'version'):
@@ -207,6 +207,17 @@ class TestTransport(object):
         self.socket.send(data)
         return len(data)
 
+    def writelines(self, list_of_data):
+        """
+        Send each piece of data separately, so that stanzas
+        written together can still be checked one by one.
+
+        Arguments:
+            list_of_data -- List of string values to write.
+        """
+        for data in list_of_data:
+            self.write(data)
+
     # ------------------------------------------------------------------
     # File Socket
 
@@ -0,0 +1,7 @@
+# cython: language_level = 3
+# Cython declarations for dispatch.py, used when it gets compiled.
+cimport cython
+
+
+@cython.locals(matched=list, finished=list)
+cpdef tuple run_handlers(object stanza, dict candidates)
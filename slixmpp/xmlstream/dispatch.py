@@ -0,0 +1,41 @@
+# slixmpp.xmlstream.dispatch
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~
+# This module delivers incoming stanzas to the stream handlers. It is
+# plain Python, compiled with Cython at install time when available
+# (see dispatch.pxd and setup.py).
+# Part of Slixmpp: The Slick XMPP Library
+# :license: MIT, see LICENSE for more details
+from __future__ import annotations
+
+from typing import Dict, List, Tuple, TYPE_CHECKING
+if TYPE_CHECKING:
+    from slixmpp.xmlstream.handler.base import BaseHandler
+    from slixmpp.xmlstream.stanzabase import StanzaBase
+
+
+def run_handlers(stanza: StanzaBase,
+                 candidates: Dict[int, BaseHandler]
+                 ) -> Tuple[bool, List[BaseHandler]]:
+    """Run every handler of ``candidates`` matching ``stanza``.
+
+    Exceptions raised by a handler are passed to
+    :meth:`~slixmpp.xmlstream.stanzabase.StanzaBase.exception`.
+
+    :param stanza: The incoming stanza.
+    :param candidates: The handlers which may accept the stanza, keyed
+                       by their id().
+    :returns: Whether any handler matched, and the handlers which
+              are done and must be removed from the stream.
+    """
+    matched = [handler for handler in candidates.values()
+               if handler.match(stanza)]
+    finished = []
+    for handler in matched:
+        handler.prerun(stanza)
+        try:
+            handler.run(stanza)
+        except Exception as e:
+            stanza.exception(e)
+        if handler.check_delete():
+            finished.append(handler)
+    return bool(matched), finished
@@ -8,9 +8,8 @@ from __future__ import annotations
 
 import weakref
 from weakref import ReferenceType
-from typing import Optional, TYPE_CHECKING, Union
+from typing import FrozenSet, Optional, TYPE_CHECKING
 from slixmpp.xmlstream.matcher.base import MatcherBase
-from xml.etree.ElementTree import Element
 
 if TYPE_CHECKING:
     from slixmpp.xmlstream import XMLStream, StanzaBase
@@ -21,7 +20,9 @@ class BaseHandler:
     """
     Base class for stream handlers. Stream handlers are matched with
     incoming stanzas so that the stanza may be processed in some way.
-    Stanzas may be matched with multiple handlers.
+    Stanzas may be matched with multiple handlers, which all receive the
+    same stanza object: handlers should not modify the stanzas they are
+    given, and should work on a copy if they need to.
 
     Handler execution may take place in two phases: during the incoming
     stream processing, and in the main event loop. The :meth:`prerun()`
@@ -63,6 +64,14 @@ class BaseHandler:
         """
         return self._matcher.match(xml)
 
+    def stanza_names(self) -> Optional[FrozenSet[str]]:
+        """Return the local names of the stanzas the handler's matcher
+        may accept, or ``None`` if it may accept any stanza.
+        """
+        # Matchers are only required to implement match()
+        get_names = getattr(self._matcher, 'stanza_names', None)
+        return get_names() if get_names is not None else None
+
     def prerun(self, payload: StanzaBase) -> None:
         """Prepare the handler for execution while the XML
         stream is being processed.
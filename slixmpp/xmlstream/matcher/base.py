@@ -4,7 +4,7 @@
 # :copyright: (c) 2011 Nathanael C. Fritz
 # :license: MIT, see LICENSE for more details
 
-from typing import Any
+from typing import Any, FrozenSet, Optional
 from slixmpp.xmlstream.stanzabase import StanzaBase
 
 
@@ -27,3 +27,13 @@ class MatcherBase(object):
         Meant to be overridden.
         """
         return False
+
+    def stanza_names(self) -> Optional[FrozenSet[str]]:
+        """Return the local names of the stanzas this matcher may accept,
+        or ``None`` if it may accept any stanza.
+
+        The stream uses it to only try the matcher against stanzas with
+        one of these names, so it must never leave out a name for which
+        :meth:`match` could return ``True``.
+        """
+        return None
@@ -3,7 +3,7 @@
 # Copyright (C) 2010  Nathanael C. Fritz
 # This file is part of Slixmpp.
 # See the file LICENSE for copying permission.
-from typing import Iterable
+from typing import FrozenSet, Iterable, Optional
 from slixmpp.xmlstream.matcher.base import MatcherBase
 from slixmpp.xmlstream.stanzabase import StanzaBase
 
@@ -38,3 +38,19 @@ class MatchMany(MatcherBase):
             if m.match(xml):
                 return True
         return False
+
+    def stanza_names(self) -> Optional[FrozenSet[str]]:
+        """Return the union of the stanza names of all criteria, or
+        ``None`` if one of them may accept any stanza.
+
+        Overrides MatcherBase.stanza_names.
+        """
+        names: FrozenSet[str] = frozenset()
+        for m in self._criteria:
+            # The criteria are only required to implement match()
+            get_names = getattr(m, 'stanza_names', None)
+            m_names = get_names() if get_names is not None else None
+            if m_names is None:
+                return None
+            names |= m_names
+        return names
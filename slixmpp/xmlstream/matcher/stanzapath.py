@@ -4,7 +4,7 @@
 # Part of Slixmpp: The Slick XMPP Library
 # :copyright: (c) 2011 Nathanael C. Fritz
 # :license: MIT, see LICENSE for more details
-from typing import cast, List
+from typing import cast, FrozenSet, List, Optional
 from slixmpp.xmlstream.matcher.base import MatcherBase
 from slixmpp.xmlstream.stanzabase import fix_ns, StanzaBase
 
@@ -43,3 +43,21 @@ class StanzaPath(MatcherBase):
                        stanza to compare against.
         """
         return stanza.match(self._criteria) or stanza.match(self._raw_criteria)
+
+    def stanza_names(self) -> Optional[FrozenSet[str]]:
+        """Return the name of the first element of the stanza path,
+        unless it is a wildcard.
+
+        That element may also name a plugin of the stanza instead of the
+        stanza itself. The stream only uses the name when it belongs to a
+        root stanza, see :meth:`XMLStream._dispatch_names
+        <slixmpp.xmlstream.xmlstream.XMLStream._dispatch_names>`.
+
+        Overrides MatcherBase.stanza_names.
+        """
+        if not self._criteria:
+            return None
+        name = self._criteria[0].split('@', 1)[0]
+        if name in ('', '*'):
+            return None
+        return frozenset((name,))
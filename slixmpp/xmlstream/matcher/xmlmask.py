@@ -3,8 +3,9 @@
 # This file is part of Slixmpp.
 # See the file LICENSE for copying permission.
 import logging
+import sys
 
-from xml.parsers.expat import ExpatError
+from typing import FrozenSet, Optional, Tuple, Union
 from xml.etree.ElementTree import Element
 
 from slixmpp.xmlstream.stanzabase import ET, StanzaBase
@@ -14,6 +15,81 @@ from slixmpp.xmlstream.matcher.base import MatcherBase
 log = logging.getLogger(__name__)
 
 
+class _CompiledMask:
+
+    """
+    Precomputed form of an XML mask element, built once when the matcher
+    is created so that matching a stanza only compares tags, attributes
+    and text without re-reading the mask.
+    """
+    __slots__ = ('tag', 'text', 'attrs', 'leaf_tags', 'children')
+
+    tag: str
+    text: Optional[str]
+    attrs: Tuple[Tuple[str, str], ...]
+    #: Tags of the subelements which are only required to be present,
+    #: such as ``<body />``.
+    leaf_tags: FrozenSet[str]
+    #: Subelements which carry text, attributes or children of their own.
+    children: Tuple['_CompiledMask', ...]
+
+    def __init__(self, mask: Element):
+        self.tag = sys.intern(mask.tag)
+        self.text = mask.text.strip() if mask.text else None
+        self.attrs = tuple(mask.attrib.items())
+        children = tuple(_CompiledMask(sub) for sub in mask)
+        self.leaf_tags = frozenset(child.tag for child in children
+                                   if child.is_leaf())
+        self.children = tuple(child for child in children
+                              if not child.is_leaf())
+
+    def is_leaf(self) -> bool:
+        """Return ``True`` if only the tag of this element is checked."""
+        return self.text is None and not (self.attrs or self.leaf_tags
+                                          or self.children)
+
+    def match(self, source: Element) -> bool:
+        """Compare an XML object against this mask, ignoring its tag.
+
+        :param source: The :class:`~xml.etree.ElementTree.Element` XML object
+                       to compare against the mask.
+        """
+        # If the mask includes text, compare it.
+        if self.text is not None and source.text and \
+           source.text.strip() != self.text:
+            return False
+
+        # Compare attributes. The stanza must include the attributes
+        # defined by the mask, but may include others.
+        attrib = source.attrib
+        for name, value in self.attrs:
+            if attrib.get(name) != value:
+                return False
+
+        # Subelements without content only need a child with the same
+        # tag, all of them are checked in a single pass over the source.
+        if self.leaf_tags:
+            missing = set(self.leaf_tags)
+            for other in source:
+                missing.discard(other.tag)
+                if not missing:
+                    break
+            if missing:
+                return False
+
+        # Check other subelements: each one must match at least one child
+        # of the source with the same tag.
+        for child in self.children:
+            for other in source:
+                if other.tag == child.tag and child.match(other):
+                    break
+            else:
+                return False
+
+        # Everything matches.
+        return True
+
+
 class MatchXMLMask(MatcherBase):
 
     """
@@ -34,12 +110,16 @@ class MatchXMLMask(MatcherBase):
                      object or XML string to use as a mask.
     """
     _criteria: Element
+    _compiled: _CompiledMask
+    _root_tags: Tuple[str, str]
 
-    def __init__(self, criteria: str, default_ns: str = 'jabber:client'):
+    def __init__(self, criteria: Union[str, Element],
+                 default_ns: str = 'jabber:client'):
         MatcherBase.__init__(self, criteria)
         if isinstance(criteria, str):
             self._criteria = ET.fromstring(criteria)
-        self.default_ns = default_ns
+        self._compiled = _CompiledMask(self._criteria)
+        self.setDefaultNS(default_ns)
 
     def setDefaultNS(self, ns: str) -> None:
         """Set the default namespace to use during comparisons.
@@ -47,6 +127,8 @@ class MatchXMLMask(MatcherBase):
         :param ns: The new namespace to use as the default.
         """
         self.default_ns = ns
+        tag = self._compiled.tag
+        self._root_tags = (tag, sys.intern("{%s}%s" % (ns, tag)))
 
     def match(self, xml: StanzaBase) -> bool:
         """Compare a stanza object or XML object against the stored XML mask.
@@ -56,53 +138,13 @@ class MatchXMLMask(MatcherBase):
         :param xml: The stanza object or XML object to compare against.
         """
         real_xml = xml.xml
-        return self._mask_cmp(real_xml, self._criteria, True)
-
-    def _mask_cmp(self, source: Element, mask: Element, use_ns: bool = False,
-                  default_ns: str = '__no_ns__') -> bool:
-        """Compare an XML object against an XML mask.
-
-        :param source: The :class:`~xml.etree.ElementTree.Element` XML object
-                       to compare against the mask.
-        :param mask: The :class:`~xml.etree.ElementTree.Element` XML object
-                     serving as the mask.
-        :param use_ns: Indicates if namespaces should be respected during
-                       the comparison.
-        :default_ns: The default namespace to apply to elements that
-                     do not have a specified namespace.
-                     Defaults to ``"__no_ns__"``.
-        """
-        if source is None:
-            # If the element was not found. May happen during recursive calls.
-            return False
-
-        mask_ns_tag = "{%s}%s" % (self.default_ns, mask.tag)
-        if source.tag not in [mask.tag, mask_ns_tag]:
-            return False
-
-        # If the mask includes text, compare it.
-        if mask.text and source.text and \
-           source.text.strip() != mask.text.strip():
+        if real_xml is None or real_xml.tag not in self._root_tags:
             return False
+        return self._compiled.match(real_xml)
 
-        # Compare attributes. The stanza must include the attributes
-        # defined by the mask, but may include others.
-        for name, value in mask.attrib.items():
-            if source.attrib.get(name, "__None__") != value:
-                return False
-
-        # Recursively check subelements.
-        matched_elements = {}
-        for subelement in mask:
-            matched = False
-            for other in source.findall(subelement.tag):
-                matched_elements[other] = False
-                if self._mask_cmp(other, subelement, use_ns):
-                    if not matched_elements.get(other, False):
-                        matched_elements[other] = True
-                        matched = True
-            if not matched:
-                return False
+    def stanza_names(self) -> Optional[FrozenSet[str]]:
+        """Return the local name of the mask root element.
 
-        # Everything matches.
-        return True
+        Overrides MatcherBase.stanza_names.
+        """
+        return frozenset((self._compiled.tag.rpartition('}')[2],))
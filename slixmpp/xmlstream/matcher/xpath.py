@@ -4,7 +4,7 @@
 # Part of Slixmpp: The Slick XMPP Library
 # :copyright: (c) 2011 Nathanael C. Fritz
 # :license: MIT, see LICENSE for more details
-from typing import cast
+from typing import cast, FrozenSet, Optional
 from slixmpp.xmlstream.stanzabase import ET, fix_ns, StanzaBase
 from slixmpp.xmlstream.matcher.base import MatcherBase
 
@@ -38,3 +38,20 @@ class MatchXPath(MatcherBase):
         x.append(real_xml)
 
         return x.find(self._criteria) is not None
+
+    def stanza_names(self) -> Optional[FrozenSet[str]]:
+        """Return the local name of the first step of the XPath
+        expression, unless it is a wildcard or a complex expression.
+
+        Overrides MatcherBase.stanza_names.
+        """
+        criteria = self._criteria
+        if criteria.startswith('{'):
+            end = criteria.find('}')
+            first = criteria[end + 1:].split('/', 1)[0]
+        else:
+            first = criteria.split('/', 1)[0]
+        name = first.split('[', 1)[0]
+        if name in ('', '.', '..') or any(c in name for c in '*@()'):
+            return None
+        return frozenset((name,))
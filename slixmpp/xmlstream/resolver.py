@@ -4,7 +4,6 @@
 # :license: MIT, see LICENSE for more details
 
 import socket
-import sys
 import logging
 import random
 from asyncio import Future, AbstractEventLoop
@@ -15,7 +15,6 @@ from typing import (
     Any,
     Callable,
     ClassVar,
-    Coroutine,
     Dict,
     List,
     Iterable,
@@ -1561,7 +1560,13 @@ class StanzaBase(ElementBase):
         :param bool clear: Indicates if the stanza's contents should be
                            removed. Defaults to ``True``.
         """
-        new_stanza = copy.copy(self)
+        if clear:
+            # The contents are dropped anyway, only copy the root element
+            xml = ET.Element(self.xml.tag, self.xml.attrib)
+            xml.text = self.xml.text
+            new_stanza = self.__class__(xml=xml, stream=self.stream)
+        else:
+            new_stanza = copy.copy(self)
         # if it's a component, use from
         if self.stream and hasattr(self.stream, "is_component") and \
                 getattr(self.stream, 'is_component'):
@@ -1569,8 +1574,6 @@ class StanzaBase(ElementBase):
         else:
             new_stanza['to'] = self['from']
             del new_stanza['from']
-        if clear:
-            new_stanza.clear()
         return new_stanza
 
     def error(self) -> StanzaBase:
@@ -14,8 +14,11 @@ from typing import (
     Generator,
     Coroutine,
     Callable,
+    FrozenSet,
+    Iterable,
     Iterator,
     List,
+    Mapping,
     Optional,
     Set,
     Union,
@@ -31,11 +34,15 @@ import functools
 import logging
 import socket as Socket
 import ssl
+import sys
+import threading
 import weakref
 import uuid
 
 from contextlib import contextmanager
+from types import MappingProxyType
 import xml.etree.ElementTree as ET
+from xml.parsers.expat import ExpatError, ParserCreate, XMLParserType
 from asyncio import (
     AbstractEventLoop,
     BaseTransport,
@@ -52,14 +59,50 @@ from slixmpp.xmlstream.tostring import tostring
 from slixmpp.xmlstream.stanzabase import StanzaBase, ElementBase
 from slixmpp.xmlstream.resolver import resolve, default_resolver
 from slixmpp.xmlstream.handler.base import BaseHandler
+from slixmpp.xmlstream.dispatch import run_handlers
 
 T = TypeVar('T')
 
 #: The time in seconds to wait before timing out waiting for response stanzas.
 RESPONSE_TIMEOUT = 30
 
+#: The size in bytes of the buffer incoming data is read into.
+RECV_BUFFER_SIZE = 65536
+
+#: The maximum number of queued items written to the transport at once.
+SEND_BATCH_SIZE = 64
+
 log = logging.getLogger(__name__)
 
+#: Global flag indicating the availability of the ``uvloop`` package.
+#: Its faster event loop is only used once the application opts in with
+#: :func:`use_uvloop`. Installing ``uvloop`` can be done via:
+#:
+#: .. code-block:: sh
+#:
+#:     pip install uvloop
+UVLOOP_AVAILABLE = False
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    log.debug("Could not find uvloop package. "
+              "Using the default asyncio event loop")
+
+
+def use_uvloop() -> bool:
+    """Make asyncio create ``uvloop`` event loops from now on.
+
+    Importing slixmpp never changes the event loop policy, call this
+    before the event loop of the application is created to opt in.
+
+    :returns: ``True`` if ``uvloop`` is installed and now used.
+    """
+    if not UVLOOP_AVAILABLE:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
 
 class ContinueQueue(Exception):
     """
@@ -94,7 +137,38 @@ Handler = Callable[[Any], Union[
 ]]
 
 
-class XMLStream(asyncio.BaseProtocol):
+class _EventHandler:
+
+    """A custom event handler, as registered with
+    :meth:`XMLStream.add_event_handler`."""
+    __slots__ = ('func', 'disposable', 'alive')
+
+    func: Handler
+    disposable: bool
+    #: Cleared once the handler is removed, so that a dispatch already in
+    #: progress does not run it again.
+    alive: bool
+
+    def __init__(self, func: Handler, disposable: bool):
+        self.func = func
+        self.disposable = disposable
+        self.alive = True
+
+
+#: Number of distinct stanza tags cached by a parser before the cache is
+#: reset. The names come from the peer, so the cache must stay bounded.
+_NAME_CACHE_SIZE = 256
+
+
+def _fixname(name: str) -> str:
+    """Convert an expat ``ns}local`` name into ElementTree's
+    ``{ns}local`` notation."""
+    if '}' in name:
+        return '{' + name
+    return name
+
+
+class XMLStream(asyncio.BufferedProtocol):
     """
     An XML stream connection manager and event dispatcher.
 
@@ -121,6 +195,35 @@ class XMLStream(asyncio.BaseProtocol):
     :param int port: The port to use for the connection. Defaults to 0.
     """
 
+    # The attributes of the stream live in slots, which avoids a
+    # __dict__ lookup on the receive and send paths. __dict__ is kept
+    # so that subclasses and plugins can still attach their own.
+    __slots__ = (
+        '__dict__', '__weakref__',
+        'transport', 'socket', '_connect_loop_wait',
+        'parser', 'xml_depth', 'xml_root', '_tb', '_pending_stanzas',
+        '_names', '_local_names', '_recv_buffer',
+        'force_starttls', 'disable_starttls', 'waiting_queue',
+        'scheduled_events', 'ssl_context', 'event_when_connected',
+        'ciphers', 'ca_certs', 'certfile', 'keyfile', '_loop',
+        'default_port', 'default_domain', '_expected_server_name',
+        '_service_name', 'address', 'use_ssl', 'use_ipv6', 'use_aiodns',
+        'use_cdata', 'default_ns', 'default_lang', 'peer_default_lang',
+        'stream_ns', 'stream_header', 'stream_footer',
+        'whitespace_keepalive', 'whitespace_keepalive_interval',
+        'tcp_keepalive', '_tcp_keepalive_enabled',
+        'end_session_on_disconnect', '_id', '_id_prefix', '_weakself',
+        '__root_stanza', '__stanza_by_tag', '__handlers',
+        '__handlers_by_name',
+        '__handlers_any', '__event_handlers', '__filters',
+        '_current_connection_attempt', '_dns_answers', 'dns_service',
+        '_dns_cache', 'dns_cache_ttl',
+        'disconnect_reason', 'disconnected', '_session_started',
+        '_always_send_everything', '_loop_thread_id', '_run_out_filters',
+        '_write_waiter', '_send_batch', '__slow_tasks',
+        '__queued_stanzas',
+    )
+
     transport: Optional[Transport]
 
     # The socket that is used internally by the transport object
@@ -130,9 +233,22 @@ class XMLStream(asyncio.BaseProtocol):
     # after each failure)
     _connect_loop_wait: float
 
-    parser: Optional[ET.XMLPullParser]
+    parser: Optional[XMLParserType]
     xml_depth: int
     xml_root: Optional[ET.Element]
+    # Builder for the stanza currently being parsed
+    _tb: Optional[ET.TreeBuilder]
+    # Stanzas completed by the parser but not yet dispatched, None marks
+    # the end of the stream
+    _pending_stanzas: List[Optional[ET.Element]]
+    # Interned ElementTree names for the stream and stanza tags reported by
+    # expat, bounded by _NAME_CACHE_SIZE
+    _names: Dict[str, str]
+    # Local names of the stanza tags in _names, used to look up the
+    # handlers, cleared along with _names
+    _local_names: Dict[str, str]
+    # Preallocated buffer the transport reads incoming data into
+    _recv_buffer: memoryview
 
     force_starttls: Optional[bool]
     disable_starttls: Optional[bool]
@@ -230,16 +346,45 @@ class XMLStream(asyncio.BaseProtocol):
     #: :attr:`whitespace_keepalive` is enabled.
     whitespace_keepalive_interval: int
 
+    #: If ``True``, let the kernel keep the connection alive with TCP
+    #: keepalive probes instead of sending whitespace, when the socket
+    #: supports it. Defaults to ``False``.
+    #:
+    #: .. warning::
+    #:
+    #:     TCP keepalive probes carry no data, so unlike whitespace they
+    #:     do not reset the idle timers of XMPP servers or of TLS and TCP
+    #:     proxies. Only enable this when nothing between the client and
+    #:     the server drops idle streams.
+    tcp_keepalive: bool
+
     #: Flag for controlling if the session can be considered ended
     #: if the connection is terminated.
     end_session_on_disconnect: bool
 
-    #: A mapping of XML namespaces to well-known prefixes.
-    namespace_map: dict
+    #: A mapping of XML namespaces to well-known prefixes. The class level
+    #: default is read-only and shared, assign a new dict to extend it.
+    namespace_map: Mapping[str, str] = MappingProxyType({
+        StanzaBase.xml_ns: 'xml',
+    })
+
+    # Counter and per-stream random prefix used to generate stanza IDs
+    _id: int
+    _id_prefix: str
 
     __root_stanza: List[Type[StanzaBase]]
-    __handlers: List[BaseHandler]
-    __event_handlers: Dict[str, List[Tuple[Handler, bool]]]
+    # Root stanza classes indexed by default namespace, then by the tags
+    # they are built from. Cleared when the root stanzas change.
+    __stanza_by_tag: Dict[str, Dict[str, Type[StanzaBase]]]
+    # Stream handlers are kept in dicts keyed by their id(), in
+    # registration order, so that removing one is cheap.
+    __handlers: Dict[int, BaseHandler]
+    # Handlers that may match a stanza, indexed by its local name. Each
+    # dict also holds the handlers of __handlers_any, in registration order.
+    __handlers_by_name: Dict[str, Dict[int, BaseHandler]]
+    # Handlers that may match any stanza
+    __handlers_any: Dict[int, BaseHandler]
+    __event_handlers: Dict[str, List[_EventHandler]]
     __filters: _FiltersDict
 
     # Current connection attempt (Future)
@@ -253,6 +398,14 @@ class XMLStream(asyncio.BaseProtocol):
     #: ``_xmpp-client._tcp`` service.
     dns_service: Optional[str]
 
+    # Resolved DNS records, indexed by the resolution parameters, along
+    # with the loop time at which they expire.
+    _dns_cache: Dict[Tuple[Any, ...], Tuple[float, List[Tuple[str, str, int]]]]
+
+    #: The number of seconds resolved DNS records are reused for
+    #: when reconnecting. Set to ``0`` to resolve on every attempt.
+    dns_cache_ttl: float
+
     #: The reason why we are disconnecting from the server
     disconnect_reason: Optional[str]
 
@@ -264,7 +417,16 @@ class XMLStream(asyncio.BaseProtocol):
     # If we want to bypass the send() check (e.g. unit tests)
     _always_send_everything: bool
 
+    # Identifier of the thread running the event loop, once connected
+    _loop_thread_id: Optional[int]
+
     _run_out_filters: Optional[Future]
+    # Set while the transport asked us to stop writing, done once its
+    # write buffer has drained
+    _write_waiter: Optional[Future]
+    # Data serialized by the send queue and not written yet. Direct writes
+    # flush it first, so that they keep their place in the stream.
+    _send_batch: List[Union[str, bytes]]
     __slow_tasks: List[Task]
     __queued_stanzas: List[Tuple[Union[StanzaBase, str], bool]]
 
@@ -276,6 +438,11 @@ class XMLStream(asyncio.BaseProtocol):
         self.parser = None
         self.xml_depth = 0
         self.xml_root = None
+        self._tb = None
+        self._pending_stanzas = []
+        self._names = {}
+        self._local_names = {}
+        self._recv_buffer = memoryview(bytearray(RECV_BUFFER_SIZE))
 
         self.force_starttls = None
         self.disable_starttls = None
@@ -324,12 +491,22 @@ class XMLStream(asyncio.BaseProtocol):
 
         self.whitespace_keepalive = True
         self.whitespace_keepalive_interval = 300
+        self.tcp_keepalive = False
+        self._tcp_keepalive_enabled = False
 
         self.end_session_on_disconnect = True
-        self.namespace_map = {StanzaBase.xml_ns: 'xml'}
+
+        self._id = 0
+        self._id_prefix = uuid.uuid4().hex + '-'
+
+        #: Weak reference to this stream, shared by every registered handler
+        self._weakself = weakref.ref(self)
 
         self.__root_stanza = []
-        self.__handlers = []
+        self.__stanza_by_tag = {}
+        self.__handlers = {}
+        self.__handlers_by_name = {}
+        self.__handlers_any = {}
         self.__event_handlers = {}
         self.__filters = {
             'in': [], 'out': [], 'out_sync': []
@@ -339,11 +516,14 @@ class XMLStream(asyncio.BaseProtocol):
 
         self._dns_answers = None
         self.dns_service = None
+        self._dns_cache = {}
+        self.dns_cache_ttl = 300
 
         self.disconnect_reason = None
         self.disconnected = Future()
         self._session_started = False
         self._always_send_everything = False
+        self._loop_thread_id = None
 
         self.add_event_handler('disconnected', self._remove_schedules)
         self.add_event_handler('disconnected', self._set_disconnected)
@@ -352,6 +532,8 @@ class XMLStream(asyncio.BaseProtocol):
         self.add_event_handler('session_resumed', self._set_session_start)
 
         self._run_out_filters = None
+        self._write_waiter = None
+        self._send_batch = []
         self.__slow_tasks = []
         self.__queued_stanzas = []
 
@@ -371,12 +553,20 @@ class XMLStream(asyncio.BaseProtocol):
         Many stanzas, handlers, or matchers may require unique
         ID values. Using this method ensures that all new ID values
         are unique in this stream.
+
+        The event loop runs in a single thread, so a plain counter is
+        enough; only the prefix is random.
         """
-        return uuid.uuid4().hex
+        self._id += 1
+        return f'{self._id_prefix}{self._id:X}'
 
     def _set_session_start(self, event: Any) -> None:
         """
         On session start, queue all pending stanzas to be sent.
+
+        Stanzas sent before the session starts are held back by
+        :meth:`send` and only reach the send queue from here, so the
+        send loop never has to wait for the session itself.
         """
         self._session_started = True
         for stanza in self.__queued_stanzas:
@@ -415,9 +605,8 @@ class XMLStream(asyncio.BaseProtocol):
 
         """
         if self._run_out_filters is None or self._run_out_filters.done():
-            self._run_out_filters = asyncio.ensure_future(
+            self._run_out_filters = self.loop.create_task(
                 self.run_filters(),
-                loop=self.loop,
             )
 
         self.disconnect_reason = None
@@ -439,9 +628,8 @@ class XMLStream(asyncio.BaseProtocol):
             self.disable_starttls = disable_starttls
 
         self.event("connecting")
-        self._current_connection_attempt = asyncio.ensure_future(
+        self._current_connection_attempt = self.loop.create_task(
             self._connect_routine(),
-            loop=self.loop,
         )
 
     async def _connect_routine(self) -> None:
@@ -449,7 +637,7 @@ class XMLStream(asyncio.BaseProtocol):
 
         if self._connect_loop_wait > 0:
             self.event('reconnect_delay', self._connect_loop_wait)
-            await asyncio.sleep(self._connect_loop_wait, loop=self.loop)
+            await asyncio.sleep(self._connect_loop_wait)
 
         record = await self._pick_dns_answer(self.default_domain)
         if record is not None:
@@ -461,6 +649,7 @@ class XMLStream(asyncio.BaseProtocol):
             # No DNS records left, stop iterating
             # and try (host, port) as a last resort
             self._dns_answers = None
+            self.invalidate_dns(self.default_domain)
 
         ssl_context: Optional[ssl.SSLContext]
         if self.use_ssl:
@@ -486,9 +675,8 @@ class XMLStream(asyncio.BaseProtocol):
             if self._current_connection_attempt is None:
                 return
             self._connect_loop_wait = self._connect_loop_wait * 2 + 1
-            self._current_connection_attempt = asyncio.ensure_future(
+            self._current_connection_attempt = self.loop.create_task(
                 self._connect_routine(),
-                loop=self.loop,
             )
 
     def process(self, *, forever: bool = True, timeout: Optional[int] = None) -> None:
@@ -504,10 +692,10 @@ class XMLStream(asyncio.BaseProtocol):
             else:
                 self.loop.run_until_complete(self.disconnected)
         else:
-            tasks: List[Future] = [asyncio.sleep(timeout, loop=self.loop)]
+            tasks: List[Future] = [self.loop.create_task(asyncio.sleep(timeout))]
             if not forever:
                 tasks.append(self.disconnected)
-            self.loop.run_until_complete(asyncio.wait(tasks, loop=self.loop))
+            self.loop.run_until_complete(asyncio.wait(tasks))
 
     def init_parser(self) -> None:
         """init the XML parser. The parser must always be reset for each new
@@ -515,7 +703,92 @@ class XMLStream(asyncio.BaseProtocol):
         """
         self.xml_depth = 0
         self.xml_root = None
-        self.parser = ET.XMLPullParser(("start", "end"))
+        self._tb = None
+        self._pending_stanzas = []
+        self._names = {}
+        self._local_names = {}
+        parser = ParserCreate(namespace_separator='}')
+        parser.buffer_text = True
+        parser.StartElementHandler = self._parser_start
+        parser.EndElementHandler = self._parser_end
+        parser.CharacterDataHandler = self._parser_data
+        self.parser = parser
+
+    def _etree_name(self, name: str) -> str:
+        """Return the interned ElementTree name for the expat name of a
+        stream or stanza tag.
+
+        These names are cached, so the few tags used for dispatching are
+        built once and compare by identity in the handler lookups. The
+        namespace is split off at the same time, so that dispatching a
+        stanza does not have to parse its tag again. The peer chooses
+        the names, so the cache is reset when it grows too large.
+        """
+        try:
+            return self._names[name]
+        except KeyError:
+            if len(self._names) >= _NAME_CACHE_SIZE:
+                self._names.clear()
+                self._local_names.clear()
+            fixed = self._names[name] = sys.intern(_fixname(name))
+            if self.xml_depth == 1:
+                # Only stanzas are dispatched, not the stream root
+                self._local_names[fixed] = sys.intern(
+                    name.rpartition('}')[2])
+            return fixed
+
+    def _parser_start(self, name: str, attrs: Dict[str, str]) -> None:
+        """Expat callback for an opening tag.
+
+        Only the stream root and the elements of the stanza being parsed are
+        turned into ElementTree objects.
+        """
+        # Only the stream and stanza tags are used for dispatching
+        if self.xml_depth <= 1:
+            tag = self._etree_name(name)
+        else:
+            tag = _fixname(name)
+        if attrs:
+            attrs = {_fixname(key): value for key, value in attrs.items()}
+        if self.xml_depth == 0:
+            # We have received the start of the root element.
+            self.xml_root = ET.Element(tag, attrs)
+            # The lazy formatting of log.debug() would not prevent the
+            # serialization itself.
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug('RECV: %s', tostring(self.xml_root,
+                                               xmlns=self.default_ns,
+                                               stream=self,
+                                               top_level=True,
+                                               open_only=True))
+            self.start_stream_handler(self.xml_root)
+        else:
+            if self.xml_depth == 1:
+                # Each stanza gets its own builder, so nothing is ever
+                # attached to the root element.
+                self._tb = ET.TreeBuilder()
+            if self._tb is not None:
+                self._tb.start(tag, attrs)
+        self.xml_depth += 1
+
+    def _parser_end(self, name: str) -> None:
+        """Expat callback for a closing tag."""
+        self.xml_depth -= 1
+        if self.xml_depth == 0:
+            # The stream's root element has closed, terminating the stream.
+            self._pending_stanzas.append(None)
+        elif self._tb is not None:
+            self._tb.end(_fixname(name))
+            if self.xml_depth == 1:
+                # A stanza is an XML element that is a direct child of
+                # the root element, hence the check of depth == 1
+                self._pending_stanzas.append(self._tb.close())
+                self._tb = None
+
+    def _parser_data(self, data: str) -> None:
+        """Expat callback for text content."""
+        if self._tb is not None:
+            self._tb.data(data)
 
     def connection_made(self, transport: BaseTransport) -> None:
         """Called when the TCP connection has been established with the server
@@ -524,16 +797,48 @@ class XMLStream(asyncio.BaseProtocol):
         self.transport = cast(Transport, transport)
         if self.transport is None:
             raise ValueError("Transport cannot be none")
+        self._loop_thread_id = threading.get_ident()
         self.socket = self.transport.get_extra_info(
             "ssl_object",
             default=self.transport.get_extra_info("socket")
         )
+        self._tcp_keepalive_enabled = self._enable_tcp_keepalive(
+            self.transport)
         self._current_connection_attempt = None
         self.init_parser()
         self.send_raw(self.stream_header)
         self._dns_answers = None
 
-    def data_received(self, data: bytes) -> None:
+    def pause_writing(self) -> None:
+        """Called by the transport when its write buffer goes over the
+        high-water mark. The send queue waits until :meth:`resume_writing`
+        is called.
+        """
+        if self._write_waiter is None:
+            self._write_waiter = self.loop.create_future()
+
+    def resume_writing(self) -> None:
+        """Called by the transport when its write buffer has drained
+        below the low-water mark.
+        """
+        waiter = self._write_waiter
+        self._write_waiter = None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        """Called by the transport to get a buffer to read incoming data
+        into, the same buffer is reused for every read.
+        """
+        return self._recv_buffer
+
+    def buffer_updated(self, nbytes: int) -> None:
+        """Called when the transport has read ``nbytes`` bytes into the
+        buffer returned by :meth:`get_buffer`.
+        """
+        self.data_received(self._recv_buffer[:nbytes])
+
+    def data_received(self, data: Union[bytes, memoryview]) -> None:
         """Called when incoming data is received on the socket.
 
         We feed that data to the parser and the see if this produced any XML
@@ -541,41 +846,32 @@ class XMLStream(asyncio.BaseProtocol):
         the stream is opened, etc).
         """
         if self.parser is None:
+            if isinstance(data, memoryview):
+                data = data.tobytes()
             log.warning('Received data before the connection is established: %r',
                         data)
             return
-        self.parser.feed(data)
+        # Stanzas are dispatched once the parser returns, so that an
+        # exception raised by a handler can not leave expat in a broken
+        # state.
         try:
-            for event, xml in self.parser.read_events():
-                if event == 'start':
-                    if self.xml_depth == 0:
-                        # We have received the start of the root element.
-                        self.xml_root = xml
-                        log.debug('RECV: %s', tostring(self.xml_root,
-                                                       xmlns=self.default_ns,
-                                                       stream=self,
-                                                       top_level=True,
-                                                       open_only=True))
-                        self.start_stream_handler(self.xml_root)
-                    self.xml_depth += 1
-                if event == 'end':
-                    self.xml_depth -= 1
-                    if self.xml_depth == 0:
-                        # The stream's root element has closed,
-                        # terminating the stream.
-                        log.debug("End of stream received")
-                        self.disconnect_reason = "End of stream"
-                        self.abort()
-                        return
-                    elif self.xml_depth == 1:
-                        # A stanza is an XML element that is a direct child of
-                        # the root element, hence the check of depth == 1
-                        self._spawn_event(xml)
-                        if self.xml_root is not None:
-                            # Keep the root element empty of children to
-                            # save on memory use.
-                            self.xml_root.clear()
-        except ET.ParseError:
+            self.parser.Parse(data, False)
+            parse_error = False
+        except ExpatError:
+            parse_error = True
+        stanzas = self._pending_stanzas
+        self._pending_stanzas = []
+        spawn_event = self._spawn_event
+        for xml in stanzas:
+            if xml is None:
+                log.debug("End of stream received")
+                self.disconnect_reason = "End of stream"
+                self.abort()
+                return
+            spawn_event(xml)
+        if parse_error:
+            if isinstance(data, memoryview):
+                data = data.tobytes()
             log.error('Parse error: %r', data)
 
             # Due to cyclic dependencies, this can’t be imported at the module
@@ -608,6 +904,10 @@ class XMLStream(asyncio.BaseProtocol):
         self.parser = None
         self.transport = None
         self.socket = None
+        # Do not write what was meant for this stream on the next one
+        self._send_batch = []
+        # Do not leave the send queue waiting on a transport that is gone
+        self.resume_writing()
         # Fire the events after cleanup
         if self.end_session_on_disconnect:
             self._reset_sendq()
@@ -653,14 +953,12 @@ class XMLStream(asyncio.BaseProtocol):
             self.disconnect_reason = reason
             if self.waiting_queue.empty() or ignore_send_queue:
                 self.cancel_connection_attempt()
-                return asyncio.ensure_future(
+                return self.loop.create_task(
                     self._end_stream_wait(wait, reason=reason),
-                    loop=self.loop,
                 )
             else:
-                return asyncio.ensure_future(
+                return self.loop.create_task(
                     self._consume_send_queue_before_disconnecting(reason, wait),
-                    loop=self.loop,
                 )
         else:
             self._set_disconnected_future()
@@ -715,7 +1013,7 @@ class XMLStream(asyncio.BaseProtocol):
         log.debug("reconnecting...")
         async def handler(event: Any) -> None:
             # We yield here to allow synchronous handlers to work first
-            await asyncio.sleep(0, loop=self.loop)
+            await asyncio.sleep(0)
             self.connect()
         self.add_event_handler('disconnected', handler, disposable=True)
         self.disconnect(wait, reason)
@@ -798,15 +1096,48 @@ class XMLStream(asyncio.BaseProtocol):
             log.debug("Connection error:", exc_info=True)
             self.disconnect()
             return False
-        der_cert = transp.get_extra_info("ssl_object").getpeercert(True)
-        pem_cert = ssl.DER_cert_to_PEM_cert(der_cert)
-        self.event('ssl_cert', pem_cert)
+        # Only convert the certificate when someone is interested in it
+        if self.event_handled('ssl_cert'):
+            der_cert = transp.get_extra_info("ssl_object").getpeercert(True)
+            pem_cert = ssl.DER_cert_to_PEM_cert(der_cert)
+            self.event('ssl_cert', pem_cert)
         # If we use the builtin start_tls, the connection_made() protocol
         # method is not called automatically
         if hasattr(self.loop, 'start_tls'):
             self.connection_made(transp)
         return True
 
+    def _enable_tcp_keepalive(self, transport: Transport) -> bool:
+        """Ask the kernel to send TCP keepalive probes on the socket.
+
+        Returns ``True`` if the probes were set up to start after
+        :attr:`whitespace_keepalive_interval` seconds of idleness. The
+        interval between probes is left to the system, so that a dead
+        peer is noticed shortly after that.
+
+        :param transport: The transport of the new connection.
+        """
+        if not (self.whitespace_keepalive and self.tcp_keepalive):
+            return False
+        idle_option = getattr(Socket, 'TCP_KEEPIDLE', None)
+        if idle_option is None:
+            # macOS names this option TCP_KEEPALIVE
+            idle_option = getattr(Socket, 'TCP_KEEPALIVE', None)
+        if idle_option is None:
+            return False
+        sock = transport.get_extra_info('socket')
+        if sock is None:
+            return False
+        try:
+            sock.setsockopt(Socket.SOL_SOCKET, Socket.SO_KEEPALIVE, 1)
+            sock.setsockopt(Socket.IPPROTO_TCP, idle_option,
+                            self.whitespace_keepalive_interval)
+        except (AttributeError, OSError):
+            log.debug('Unable to enable TCP keepalive, '
+                      'falling back to whitespace', exc_info=True)
+            return False
+        return True
+
     def _start_keepalive(self, event: Any) -> None:
         """Begin sending whitespace periodically to keep the connection alive.
 
@@ -817,7 +1148,12 @@ class XMLStream(asyncio.BaseProtocol):
         The keepalive interval can be set using::
 
             self.whitespace_keepalive_interval = 300
+
+        Nothing is scheduled when TCP keepalive probes could be enabled
+        on the socket, see :attr:`tcp_keepalive`.
         """
+        if not self.whitespace_keepalive or self._tcp_keepalive_enabled:
+            return
         self.schedule('Whitespace Keepalive',
                       self.whitespace_keepalive_interval,
                       self.send_raw,
@@ -853,6 +1189,7 @@ class XMLStream(asyncio.BaseProtocol):
         :param stanza_class: The top-level stanza object's class.
         """
         self.__root_stanza.append(stanza_class)
+        self.__stanza_by_tag.clear()
 
     def remove_stanza(self, stanza_class: Type[StanzaBase]) -> None:
         """Remove a stanza from being a known root stanza.
@@ -865,6 +1202,7 @@ class XMLStream(asyncio.BaseProtocol):
         matchers.
         """
         self.__root_stanza.remove(stanza_class)
+        self.__stanza_by_tag.clear()
 
     def add_filter(self, mode: FilterString, handler: Callable[[StanzaBase], Optional[StanzaBase]], order: Optional[int] = None) -> None:
         """Add a filter for incoming or outgoing stanzas.
@@ -901,20 +1239,67 @@ class XMLStream(asyncio.BaseProtocol):
                 derived object to execute.
         """
         if handler.stream is None:
-            self.__handlers.append(handler)
-            handler.stream = weakref.ref(self)
+            key = id(handler)
+            self.__handlers[key] = handler
+            names = self._dispatch_names(handler)
+            if names is None:
+                self.__handlers_any[key] = handler
+                for bucket in self.__handlers_by_name.values():
+                    bucket[key] = handler
+            else:
+                for name in names:
+                    named = self.__handlers_by_name.get(name)
+                    if named is None:
+                        named = dict(self.__handlers_any)
+                        self.__handlers_by_name[sys.intern(name)] = named
+                    named[key] = handler
+            handler.stream = self._weakself
+
+    def _dispatch_names(self, handler: BaseHandler) -> Optional[FrozenSet[str]]:
+        """Return the stanza names a handler is indexed under, or ``None``
+        if it has to be tried on every stanza.
+
+        A stanza path may start with the name of a stanza plugin instead
+        of a root stanza, so only the names of registered root stanzas,
+        which no other root stanza uses for a plugin, are kept.
+        """
+        names = handler.stanza_names()
+        if names is None:
+            return None
+        stanza_classes: List[Type[StanzaBase]] = [*self.__root_stanza,
+                                                  StanzaBase]
+        for name in names:
+            known = False
+            for stanza_class in stanza_classes:
+                if name == stanza_class.name:
+                    known = True
+                elif name in stanza_class.plugin_attrib_map or \
+                        name in stanza_class.plugin_attrib:
+                    return None
+            if not known:
+                return None
+        return names
+
+    def _unregister_handler(self, handler: BaseHandler) -> None:
+        """Remove a handler from the stream and from the dicts used to
+        dispatch stanzas."""
+        key = id(handler)
+        self.__handlers.pop(key, None)
+        # The root stanzas may have changed since the handler was indexed,
+        # look for it everywhere. There is one dict per stanza name.
+        self.__handlers_any.pop(key, None)
+        for bucket in self.__handlers_by_name.values():
+            bucket.pop(key, None)
 
     def remove_handler(self, name: str) -> bool:
         """Remove any stream event handlers with the given name.
 
         :param name: The name of the handler.
         """
-        idx = 0
-        for handler in self.__handlers:
+        for handler in self.__handlers.values():
             if handler.name == name:
-                self.__handlers.pop(idx)
+                self._unregister_handler(handler)
                 return True
-            idx += 1
         return False
 
     async def get_dns_records(self, domain: str, port: Optional[int] = None) -> List[Tuple[str, str, int]]:
@@ -926,6 +1311,11 @@ class XMLStream(asyncio.BaseProtocol):
         if port is None:
             port = self.default_port
 
+        key = (domain, port, self.dns_service, self.use_ipv6, self.use_aiodns)
+        cached = self._dns_cache.get(key)
+        if cached is not None and self.loop.time() < cached[0]:
+            return list(cached[1])
+
         resolver = default_resolver(loop=self.loop)
         self.configure_dns(resolver, domain=domain, port=port)
 
@@ -935,8 +1325,25 @@ class XMLStream(asyncio.BaseProtocol):
                                     use_ipv6=self.use_ipv6,
                                     use_aiodns=self.use_aiodns,
                                     loop=self.loop)
+        result = list(result)
+        if result and self.dns_cache_ttl > 0:
+            expiry = self.loop.time() + self.dns_cache_ttl
+            self._dns_cache[key] = (expiry, result[:])
         return result
 
+    def invalidate_dns(self, domain: Optional[str] = None) -> None:
+        """Forget the cached DNS records of a domain.
+
+        :param domain: The domain in question, or ``None`` to clear
+                       the records of every domain.
+        """
+        if domain is None:
+            self._dns_cache.clear()
+            return
+        for key in list(self._dns_cache):
+            if key[0] == domain:
+                del self._dns_cache[key]
+
     async def _pick_dns_answer(self, domain: str, port: Optional[int] = None) -> Optional[Tuple[str, str, int]]:
         """Pick a server and port from DNS answers.
 
@@ -967,7 +1374,7 @@ class XMLStream(asyncio.BaseProtocol):
         """
         if not name in self.__event_handlers:
             self.__event_handlers[name] = []
-        self.__event_handlers[name].append((pointer, disposable))
+        self.__event_handlers[name].append(_EventHandler(pointer, disposable))
 
     def del_event_handler(self, name: str, pointer: Callable[..., Any]) -> None:
         """Remove a function as a handler for an event.
@@ -975,17 +1382,20 @@ class XMLStream(asyncio.BaseProtocol):
         :param name: The name of the event.
         :param pointer: The function to remove as a handler.
         """
-        if not name in self.__event_handlers:
+        handlers = self.__event_handlers.get(name)
+        if handlers is None:
             return
 
-        # Need to keep handlers that do not use
-        # the given function pointer
-        def filter_pointers(handler: Tuple[Callable[..., Any], bool]) -> bool:
-            return handler[0] != pointer
-
-        self.__event_handlers[name] = list(filter(
-            filter_pointers,
-            self.__event_handlers[name]))
+        # Remove the handlers using the given function pointer in place.
+        # This compares with ==, as bound methods are new objects on
+        # every attribute access.
+        for index in range(len(handlers) - 1, -1, -1):
+            handler = handlers[index]
+            if handler.func == pointer:
+                handler.alive = False
+                del handlers[index]
+        if not handlers:
+            del self.__event_handlers[name]
 
     def event_handled(self, name: str) -> int:
         """Returns the number of registered handlers for an event.
@@ -1006,17 +1416,18 @@ class XMLStream(asyncio.BaseProtocol):
                      Defaults to an empty dictionary, but is usually
                      a stanza object.
         """
-        handlers = self.__event_handlers.get(name, [])[:]
-        for handler in handlers:
-            handler_callback, disposable = handler
-            if disposable:
+        handlers = self.__event_handlers.get(name)
+        if not handlers:
+            return
+        for handler in handlers[:]:
+            if not handler.alive:
+                continue
+            handler_callback = handler.func
+            if handler.disposable:
                 # If the handler is disposable, we will go ahead and
                 # remove it now instead of waiting for it to be
                 # processed in the queue.
-                try:
-                    self.__event_handlers[name].remove(handler)
-                except ValueError:
-                    pass
+                self._discard_event_handler(name, handler)
             # If the callback is a coroutine, schedule it instead of
             # running it directly
             if iscoroutinefunction(handler_callback):
@@ -1040,27 +1451,29 @@ class XMLStream(asyncio.BaseProtocol):
                      Defaults to an empty dictionary, but is usually
                      a stanza object.
         """
+        handlers = self.__event_handlers.get(name)
+        # Most events have no handler, do not even log those
+        if not handlers:
+            return
         log.debug("Event triggered: %s", name)
 
-        handlers = self.__event_handlers.get(name, [])[:]
-        for handler in handlers:
-            handler_callback, disposable = handler
-            old_exception = getattr(data, 'exception', None)
+        # Every handler receives the same data object, it is not copied
+        old_exception = getattr(data, 'exception', None)
+        for handler in handlers[:]:
+            if not handler.alive:
+                continue
+            handler_callback = handler.func
+            if handler.disposable:
+                # Disable the handler before running it, so that it is
+                # not run again if it triggers the same event.
+                handler.alive = False
 
             # If the callback is a coroutine, schedule it instead of
             # running it directly
             if iscoroutinefunction(handler_callback):
-                async def handler_callback_routine(cb: Callable[[ElementBase], Any]) -> None:
-                    try:
-                        await cb(data)
-                    except Exception as e:
-                        if old_exception:
-                            old_exception(e)
-                        else:
-                            self.exception(e)
-                asyncio.ensure_future(
-                    handler_callback_routine(handler_callback),
-                    loop=self.loop,
+                self.loop.create_task(
+                    self._run_coroutine_handler(handler_callback, data,
+                                                old_exception),
                 )
             else:
                 try:
@@ -1070,14 +1483,39 @@ class XMLStream(asyncio.BaseProtocol):
                         old_exception(e)
                     else:
                         self.exception(e)
-            if disposable:
+            if handler.disposable:
                 # If the handler is disposable, we will go ahead and
                 # remove it now instead of waiting for it to be
                 # processed in the queue.
-                try:
-                    self.__event_handlers[name].remove(handler)
-                except ValueError:
-                    pass
+                self._discard_event_handler(name, handler)
+
+    async def _run_coroutine_handler(self, handler_callback: Handler,
+                                     data: Any,
+                                     old_exception: Optional[Callable[[Exception], None]]) -> None:
+        """Run a coroutine event handler, reporting its errors like
+        :meth:`event` does for regular handlers."""
+        try:
+            await handler_callback(data)
+        except Exception as e:
+            if old_exception:
+                old_exception(e)
+            else:
+                self.exception(e)
+
+    def _discard_event_handler(self, name: str,
+                               handler: _EventHandler) -> None:
+        """Remove a single event handler object, if still registered."""
+        handler.alive = False
+        handlers = self.__event_handlers.get(name)
+        if handlers is None:
+            return
+        # _EventHandler does not define __eq__, so this compares identity
+        try:
+            handlers.remove(handler)
+        except ValueError:
+            return
+        if not handlers:
+            del self.__event_handlers[name]
 
     def schedule(self, name: str, seconds: int, callback: Callable[..., None],
             args: Tuple[Any, ...] = tuple(),
@@ -1092,16 +1530,36 @@ class XMLStream(asyncio.BaseProtocol):
                        the function.
         :param repeat: Flag indicating if the scheduled event should
                        be reset and repeat after executing.
+        :raises ValueError: If an event is already scheduled under
+                            ``name``.
+
+        When called from a thread other than the one running the event
+        loop, the event is only scheduled later, from the loop. This
+        method then returns right away and does not raise: a duplicate
+        ``name`` is reported by the loop's exception handler instead.
         """
+        if not self._in_loop_thread():
+            self.loop.call_soon_threadsafe(
+                functools.partial(self.schedule, name, seconds, callback,
+                                  args, kwargs, repeat))
+            return
         if name in self.scheduled_events:
             raise ValueError(
                 "There is already a scheduled event of name: %s" % name)
         if seconds is None:
             seconds = RESPONSE_TIMEOUT
-        cb = functools.partial(callback, *args, **kwargs)
+        cb: Callable[..., None]
+        if args or kwargs:
+            cb = functools.partial(callback, *args, **kwargs)
+        else:
+            cb = callback
         if repeat:
+            # The callback finds its own handle in this cell, to know if
+            # the event is still scheduled under that name after a run.
+            current: List[Optional[TimerHandle]] = [None]
             handle = self.loop.call_later(seconds, self._execute_and_reschedule,
-                                          name, cb, seconds)
+                                          name, cb, seconds, current)
+            current[0] = handle
         else:
             handle = self.loop.call_later(seconds, self._execute_and_unschedule,
                                           name, cb)
@@ -1114,7 +1572,7 @@ class XMLStream(asyncio.BaseProtocol):
             handle = self.scheduled_events.pop(name)
             handle.cancel()
         except KeyError:
-            log.debug("Tried to cancel unscheduled event: %s" % (name,))
+            log.debug("Tried to cancel unscheduled event: %s", name)
 
     def _safe_cb_run(self, name: str, cb: Callable[[], None]) -> None:
         log.debug('Scheduled event: %s', name)
@@ -1123,23 +1581,28 @@ class XMLStream(asyncio.BaseProtocol):
         except Exception as e:
             self.exception(e)
 
-    def _execute_and_reschedule(self, name: str, cb: Callable[[], None], seconds: int) -> None:
+    def _execute_and_reschedule(self, name: str, cb: Callable[[], None], seconds: int,
+                                current: List[Optional[TimerHandle]]) -> None:
         """Simple method that calls the given callback, and then schedule itself to
         be called after the given number of seconds.
         """
         self._safe_cb_run(name, cb)
+        # The callback may have cancelled or replaced this event
+        if self.scheduled_events.get(name) is not current[0]:
+            return
         handle = self.loop.call_later(seconds, self._execute_and_reschedule,
-                                      name, cb, seconds)
+                                      name, cb, seconds, current)
+        current[0] = handle
         self.scheduled_events[name] = handle
 
     def _execute_and_unschedule(self, name: str, cb: Callable[[], None]) -> None:
         """
-        Execute the callback and remove the handler for it.
+        Remove the handler for the callback and execute it.
         """
+        # A cancelled event never runs, so the entry can only be this one.
+        # Removing it first lets the callback schedule the name again.
+        self.scheduled_events.pop(name, None)
         self._safe_cb_run(name, cb)
-        # workaround for specific events which unschedule themselves
-        if name in self.scheduled_events:
-            del self.scheduled_events[name]
 
     def incoming_filter(self, xml: ET.Element) -> ET.Element:
         """Filter incoming XML objects before they are processed.
@@ -1205,8 +1668,41 @@ class XMLStream(asyncio.BaseProtocol):
     async def run_filters(self) -> NoReturn:
         """
         Background loop that processes stanzas to send.
+
+        Stanzas queued during the same iteration of the event loop are
+        serialized in a row and written to the transport with a single
+        call, up to :data:`SEND_BATCH_SIZE` items. They are only marked as
+        done in the queue once written. The loop stops while the transport
+        is paused, see :meth:`pause_writing`.
+
+        The pending data is kept in :attr:`_send_batch`, and direct writes
+        with :meth:`send_raw` or :meth:`send_raw_many` flush it first, so
+        that data written by the filters keeps its place in the stream.
         """
+        # Number of items taken from the queue and not marked as done yet
+        unfinished = 0
+        # Whether the loop already waited for more items for this batch
+        yielded = False
         while True:
+            batch = self._send_batch
+            full = len(batch) >= SEND_BATCH_SIZE
+            if full or self.waiting_queue.empty():
+                if batch and not full and not yielded:
+                    # Let the callbacks of this loop iteration queue more
+                    # stanzas, so that they are part of the same write.
+                    # Only once, a steady producer must not delay it.
+                    yielded = True
+                    await asyncio.sleep(0)
+                    if not self.waiting_queue.empty():
+                        continue
+                self._write_batch()
+                yielded = False
+                for _ in range(unfinished):
+                    self.waiting_queue.task_done()
+                unfinished = 0
+            if self._write_waiter is not None:
+                # Let the transport flush its buffer before writing more
+                await asyncio.shield(self._write_waiter)
             data: Optional[Union[StanzaBase, str]]
             (data, use_filters) = await self.waiting_queue.get()
             try:
@@ -1216,20 +1712,22 @@ class XMLStream(asyncio.BaseProtocol):
                         for filter in self.__filters['out']:
                             already_run_filters.add(filter)
                             if iscoroutinefunction(filter):
+                                # Do not hold back the previous stanzas
+                                # while waiting for this one.
+                                self._write_batch()
                                 filter = cast(AsyncFilter, filter)
-                                task = asyncio.create_task(filter(data))
+                                task = self.loop.create_task(filter(data))
                                 completed, pending = await wait(
                                     {task},
                                     timeout=1,
                                 )
                                 if pending:
                                     self.__slow_tasks.append(task)
-                                    asyncio.ensure_future(
+                                    self.loop.create_task(
                                         self._continue_slow_send(
                                             task,
                                             already_run_filters
                                         ),
-                                        loop=self.loop,
                                     )
                                     raise ContinueQueue(
                                         "Slow coroutine, rescheduling filters"
@@ -1253,14 +1751,27 @@ class XMLStream(asyncio.BaseProtocol):
                                             stream=self, top_level=True)
                     else:
                         str_data = data
-                    self.send_raw(str_data)
+                    self._send_batch.append(str_data)
                 elif isinstance(data, (str, bytes)):
-                    self.send_raw(data)
+                    self._send_batch.append(data)
             except ContinueQueue as exc:
                 log.debug('Stanza in send queue not sent: %s', exc)
             except Exception:
                 log.error('Exception raised in send queue:', exc_info=True)
-            self.waiting_queue.task_done()
+            unfinished += 1
+
+    def _write_batch(self) -> None:
+        """Send the data collected by the send queue, if any, logging
+        errors instead of stopping the queue.
+        """
+        batch = self._send_batch
+        if not batch:
+            return
+        self._send_batch = []
+        try:
+            self.send_raw_many(batch)
+        except Exception:
+            log.error('Exception raised in send queue:', exc_info=True)
 
     def send(self, data: Union[StanzaBase, str], use_filters: bool = True) -> None:
         """A wrapper for :meth:`send_raw()` for sending stanza objects.
@@ -1272,6 +1783,11 @@ class XMLStream(asyncio.BaseProtocol):
                                  filters is useful when resending stanzas.
                                  Defaults to ``True``.
         """
+        if not self._in_loop_thread():
+            # Plugins running their own threads must not touch the
+            # send queue directly, hand the stanza over to the loop.
+            self.loop.call_soon_threadsafe(self.send, data, use_filters)
+            return
         # When not connected, allow features/starttls/etc to go through
         # but not stanzas or arbitrary payloads.
         if not self._always_send_everything and not self._session_started:
@@ -1288,6 +1804,12 @@ class XMLStream(asyncio.BaseProtocol):
                 return
         self.waiting_queue.put_nowait((data, use_filters))
 
+    def _in_loop_thread(self) -> bool:
+        """Return ``True`` if called from the thread running the event
+        loop, or if the stream has not been connected yet."""
+        thread_id = self._loop_thread_id
+        return thread_id is None or thread_id == threading.get_ident()
+
     def send_xml(self, data: ET.Element) -> None:
         """Send an XML object on the stream
 
@@ -1299,15 +1821,43 @@ class XMLStream(asyncio.BaseProtocol):
     def send_raw(self, data: Union[str, bytes]) -> None:
         """Send raw data across the stream.
 
-        :param string data: Any bytes or utf-8 string value.
+        :param string data: Any bytes or utf-8 string value. Only
+                            strings are encoded, other values are
+                            written as they are.
         """
+        # Filters of the send queue may write directly, after the
+        # stanzas serialized before theirs.
+        self._write_batch()
         log.debug("SEND: %s", data)
         if not self.transport:
             raise NotConnectedError()
         if isinstance(data, str):
-            data = data.encode('utf-8')
+            data = data.encode()
         self.transport.write(data)
 
+    def send_raw_many(self, data: Iterable[Union[str, bytes]]) -> None:
+        """Send several pieces of raw data across the stream with a single
+        transport call.
+
+        The transport buffers whatever the socket does not accept right
+        away and retries on its own; :meth:`pause_writing` tells the send
+        loop when that buffer grows too large.
+
+        :param data: Bytes or utf-8 string values, sent in order. Each
+                     string is encoded exactly once, here.
+        """
+        self._write_batch()
+        transport = self.transport
+        if not transport:
+            raise NotConnectedError()
+        chunks = []
+        for piece in data:
+            log.debug("SEND: %s", piece)
+            if isinstance(piece, str):
+                piece = piece.encode()
+            chunks.append(piece)
+        transport.writelines(chunks)
+
     def _build_stanza(self, xml: ET.Element,
                       default_ns: Optional[str] = None) -> StanzaBase:
         """Create a stanza object from a given XML object.
@@ -1323,14 +1873,20 @@ class XMLStream(asyncio.BaseProtocol):
         """
         if default_ns is None:
             default_ns = self.default_ns
-        stanza_type = StanzaBase
-        for stanza_class in self.__root_stanza:
-            if xml.tag == "{%s}%s" % (default_ns, stanza_class.name) or \
-               xml.tag == stanza_class.tag_name():
-                stanza_type = stanza_class
-                break
+        stanza_types = self.__stanza_by_tag.get(default_ns)
+        if stanza_types is None:
+            # The first registered class accepting a tag is used for it
+            stanza_types = {}
+            for stanza_class in self.__root_stanza:
+                stanza_types.setdefault(
+                    "{%s}%s" % (default_ns, stanza_class.name), stanza_class)
+                stanza_types.setdefault(stanza_class.tag_name(), stanza_class)
+            self.__stanza_by_tag[default_ns] = stanza_types
+        stanza_type = stanza_types.get(xml.tag, StanzaBase)
         stanza = stanza_type(self, xml, recv=True)
-        if stanza['lang'] is None and self.peer_default_lang:
+        # Looking up an interface is about as costly as building the
+        # stanza, only do it when there is a default to apply.
+        if self.peer_default_lang and stanza['lang'] is None:
             stanza['lang'] = self.peer_default_lang
         return stanza
 
@@ -1348,30 +1904,30 @@ class XMLStream(asyncio.BaseProtocol):
 
         # Convert the raw XML object into a stanza object. If no registered
         # stanza type applies, a generic StanzaBase stanza will be used.
-        stanza: Optional[StanzaBase] = self._build_stanza(xml)
+        stanza = self._build_stanza(xml)
         for filter in self.__filters['in']:
-            if stanza is not None:
-                filter = cast(SyncFilter, filter)
-                stanza = filter(stanza)
-        if stanza is None:
-            return
+            filter = cast(SyncFilter, filter)
+            filtered: Optional[StanzaBase] = filter(stanza)
+            if filtered is None:
+                return
+            stanza = filtered
 
         log.debug("RECV: %s", stanza)
 
         # Match the stanza against registered handlers. Handlers marked
         # to run "in stream" will be executed immediately; the rest will
         # be queued.
-        handled = False
-        matched_handlers = [h for h in self.__handlers if h.match(stanza)]
-        for handler in matched_handlers:
-            handler.prerun(stanza)
-            try:
-                handler.run(stanza)
-            except Exception as e:
-                stanza.exception(e)
-            if handler.check_delete():
-                self.__handlers.remove(handler)
-            handled = True
+        # Only the handlers that may accept this kind of stanza are tried
+        tag = stanza.xml.tag
+        name = self._local_names.get(tag)
+        if name is None:
+            # The tag was not produced by the parser, e.g. it was changed
+            # by incoming_filter().
+            name = tag[tag.find('}') + 1:]
+        candidates = self.__handlers_by_name.get(name, self.__handlers_any)
+        handled, finished = run_handlers(stanza, candidates)
+        for handler in finished:
+            self._unregister_handler(handler)
 
         # Some stanzas require responses, such as Iq queries. A default
         # handler will be executed immediately for this case.
@@ -1,3 +1,4 @@
+import asyncio
 import time
 import unittest
 from slixmpp.test import SlixTest
@@ -80,5 +81,42 @@ class TestEvents(SlixTest):
         msg = "Event was not triggered the correct number of times: %s"
         self.assertTrue(happened == [True], msg % happened)
 
+    def testDisposableEventReentrant(self):
+        """Test disposable handler not being run again by its own event."""
+        happened = []
+
+        def handletestevent(event):
+            happened.append(True)
+            self.xmpp.event("test_event", {})
+
+        self.xmpp.add_event_handler("test_event", handletestevent,
+                                    disposable=True)
+        self.xmpp.event("test_event", {})
+
+        msg = "Event was not triggered the correct number of times: %s"
+        self.assertTrue(happened == [True], msg % happened)
+        self.assertEqual(self.xmpp.event_handled("test_event"), 0)
+
+    def testScheduledEventReplacingItself(self):
+        """Test scheduled events cancelling or replacing themselves."""
+        happened = []
+
+        def once():
+            happened.append('once')
+            self.xmpp.schedule('test_once', 60, once)
+
+        def repeated():
+            happened.append('repeated')
+            self.xmpp.cancel_schedule('test_repeated')
+
+        self.xmpp.schedule('test_once', 0, once)
+        self.xmpp.schedule('test_repeated', 0, repeated, repeat=True)
+        self.run_coro(asyncio.sleep(0.01))
+
+        self.assertEqual(sorted(happened), ['once', 'repeated'])
+        self.assertIn('test_once', self.xmpp.scheduled_events)
+        self.assertNotIn('test_repeated', self.xmpp.scheduled_events)
+        self.xmpp.cancel_schedule('test_once')
+
 
 suite = unittest.TestLoader().loadTestsFromTestCase(TestEvents)
@@ -0,0 +1,61 @@
+import unittest
+from slixmpp.test import SlixTest
+from slixmpp import Message
+from slixmpp.xmlstream.matcher import MatchXMLMask
+
+
+class TestMatchXMLMask(SlixTest):
+
+    """Verify that XML masks select the expected stanzas."""
+
+    def setUp(self):
+        self.msg = Message()
+        self.msg['type'] = 'groupchat'
+        self.msg['body'] = 'Hello'
+
+    def testMatchTagAndAttributes(self):
+        """Test matching a mask on the stanza tag and attributes."""
+        mask = MatchXMLMask("<message xmlns='jabber:client' "
+                            "type='groupchat'><body /></message>")
+        self.assertTrue(mask.match(self.msg))
+
+        mask = MatchXMLMask("<message xmlns='jabber:client' "
+                            "type='chat'><body /></message>")
+        self.assertFalse(mask.match(self.msg))
+
+    def testMatchMissingSubelement(self):
+        """Test that every subelement of the mask is required."""
+        mask = MatchXMLMask("<message xmlns='jabber:client'>"
+                            "<subject /></message>")
+        self.assertFalse(mask.match(self.msg))
+
+    def testMatchSeveralSubelements(self):
+        """Test that sibling subelements are all required."""
+        self.msg['subject'] = 'Greetings'
+        mask = MatchXMLMask("<message xmlns='jabber:client'>"
+                            "<body /><subject /></message>")
+        self.assertTrue(mask.match(self.msg))
+
+        del self.msg['subject']
+        self.assertFalse(mask.match(self.msg))
+
+    def testMatchText(self):
+        """Test comparing the text of a subelement."""
+        mask = MatchXMLMask("<message xmlns='jabber:client'>"
+                            "<body> Hello </body></message>")
+        self.assertTrue(mask.match(self.msg))
+
+        mask = MatchXMLMask("<message xmlns='jabber:client'>"
+                            "<body>Goodbye</body></message>")
+        self.assertFalse(mask.match(self.msg))
+
+    def testDefaultNamespace(self):
+        """Test matching a root tag without a namespace."""
+        mask = MatchXMLMask("<message type='groupchat' />")
+        self.assertTrue(mask.match(self.msg))
+
+        mask.setDefaultNS('jabber:component:accept')
+        self.assertFalse(mask.match(self.msg))
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestMatchXMLMask)
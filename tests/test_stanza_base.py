@@ -68,5 +68,23 @@ class TestStanzaBase(SlixTest):
         self.assertTrue(stanza['payload'] == [],
             "Stanza reply did not empty stanza payload.")
 
+    def testReplyOriginalUntouched(self):
+        """Test that replying leaves the original stanza intact."""
+        stanza = StanzaBase()
+        stanza['to'] = "recipient@example.com"
+        stanza['from'] = "sender@example.com"
+        stanza['payload'] = ET.Element("{foo}foo")
+
+        reply = stanza.reply()
+        reply['type'] = 'result'
+
+        self.assertEqual(len(stanza['payload']), 1)
+        self.assertEqual(stanza['to'], "recipient@example.com")
+        self.assertEqual(stanza['type'], '')
+
+        reply = stanza.reply(clear=False)
+        self.assertEqual(len(reply['payload']), 1)
+        self.assertIsNot(reply['payload'][0], stanza['payload'][0])
+
 
 suite = unittest.TestLoader().loadTestsFromTestCase(TestStanzaBase)
@@ -1,6 +1,9 @@
+import asyncio
+import threading
 import time
 import unittest
 from slixmpp.test import SlixTest
+from slixmpp.xmlstream.xmlstream import SEND_BATCH_SIZE
 
 
 class TestStreamTester(SlixTest):
@@ -53,6 +56,121 @@ class TestStreamTester(SlixTest):
           </message>
         """)
 
+    def testDNSCache(self):
+        """Test that resolved DNS records are reused until invalidated."""
+        self.stream_start(mode='client')
+
+        resolved = []
+        def configure_dns(resolver, domain=None, port=None):
+            resolved.append(domain)
+        self.xmpp.configure_dns = configure_dns
+
+        records = self.run_coro(self.xmpp.get_dns_records('127.0.0.1', 5222))
+        self.assertEqual(records, [('127.0.0.1', '127.0.0.1', 5222)])
+        self.run_coro(self.xmpp.get_dns_records('127.0.0.1', 5222))
+        self.assertEqual(resolved, ['127.0.0.1'])
+
+        self.xmpp.invalidate_dns('127.0.0.1')
+        self.run_coro(self.xmpp.get_dns_records('127.0.0.1', 5222))
+        self.assertEqual(resolved, ['127.0.0.1', '127.0.0.1'])
+
+    def testPauseWriting(self):
+        """Test that the send queue waits while the transport is paused."""
+        self.stream_start(mode='client')
+
+        self.xmpp.pause_writing()
+        self.xmpp.send_message(mto='user@localhost', mbody='Hi!')
+        sender = self.xmpp.loop.create_task(self.xmpp.run_filters())
+        self.wait_()
+        self.assertEqual(self.xmpp.socket.next_sent(), None)
+
+        self.xmpp.resume_writing()
+        self.wait_()
+        sender.cancel()
+        self.send("""
+          <message to="user@localhost">
+            <body>Hi!</body>
+          </message>
+        """)
+
+    def testSendSteadyProducer(self):
+        """Test that the send queue writes bounded batches, even while a
+        producer queues a stanza on every loop iteration."""
+        self.stream_start(mode='client')
+
+        transport = self.xmpp.transport
+        writelines = transport.writelines
+        writes = []
+        def counting_writelines(data):
+            writes.append(len(data))
+            writelines(data)
+        transport.writelines = counting_writelines
+
+        async def producer():
+            # A burst is written in several calls
+            for i in range(200):
+                self.xmpp.send('<presence />', use_filters=False)
+            for i in range(500):
+                self.xmpp.send('<presence />', use_filters=False)
+                await asyncio.sleep(0)
+            return len(writes)
+
+        sender = self.xmpp.loop.create_task(self.xmpp.run_filters())
+        written_while_producing = self.run_coro(producer())
+        sender.cancel()
+        self.assertGreater(written_while_producing, 0)
+        self.assertEqual(max(writes), SEND_BATCH_SIZE)
+
+    def testSendRawBytesLike(self):
+        """Test that bytes-like values are written without encoding."""
+        self.stream_start(mode='client')
+
+        self.xmpp.send_raw(bytearray(b'<presence />'))
+        self.xmpp.send_raw_many([memoryview(b'<presence />')])
+        self.send("<presence />")
+        self.send("<presence />")
+
+    def testSendFromThread(self):
+        """Test that send() and schedule() called from another thread
+        run on the event loop."""
+        self.stream_start(mode='client')
+
+        ran_in = []
+        def callback():
+            ran_in.append(threading.get_ident())
+
+        def worker():
+            self.xmpp.send_message(mto='user@localhost', mbody='Hi!')
+            self.xmpp.schedule('From thread', 0, callback)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        # Nothing was queued or scheduled from the other thread
+        self.assertTrue(self.xmpp.waiting_queue.empty())
+        self.assertNotIn('From thread', self.xmpp.scheduled_events)
+
+        self.wait_()
+        self.assertEqual(ran_in, [threading.get_ident()])
+        self.send("""
+          <message to="user@localhost">
+            <body>Hi!</body>
+          </message>
+        """)
+
+    def testParserNameCacheBounded(self):
+        """Test that peer chosen names do not grow the parser caches."""
+        self.stream_start(mode='client')
+
+        for i in range(1000):
+            self.xmpp.data_received(
+                "<message><x%d xmlns='urn:test:%d' a%d='b' /></message>"
+                "<y%d xmlns='urn:test:%d' />" % (i, i, i, i, i))
+        self.assertLessEqual(len(self.xmpp._names), 256)
+        self.assertLessEqual(len(self.xmpp._local_names), 256)
+        self.assertNotIn(self.xmpp.xml_root.tag, self.xmpp._local_names)
+        self.assertNotIn('urn:test:999}x999', self.xmpp._names)
+
     def testSendStreamHeader(self):
         """Test that we can check a sent stream header."""
         self.stream_start(mode='client', skip=False)
@@ -5,6 +5,7 @@ import unittest
 from slixmpp.test import SlixTest
 from slixmpp.exceptions import IqTimeout
 from slixmpp import Callback, MatchXPath
+from slixmpp.xmlstream.matcher import MatcherId, StanzaPath
 
 
 class TestHandlers(SlixTest):
@@ -235,5 +236,94 @@ class TestHandlers(SlixTest):
 
       self.assertEqual(events, ['tester@slixmpp.com/test'], "Did not timeout on bad sender")
 
+    def testHandlersByStanzaName(self):
+        """
+        Test that handlers indexed by stanza name and handlers
+        matching any stanza still run in registration order.
+        """
+        events = []
+
+        self.xmpp.register_handler(Callback(
+            'Test Message', MatchXPath('{test}message'),
+            lambda stanza: events.append('message')))
+        self.xmpp.register_handler(Callback(
+            'Test Id', MatcherId('test-id'),
+            lambda stanza: events.append('id')))
+        self.xmpp.register_handler(Callback(
+            'Test Iq', MatchXPath('{test}iq'),
+            lambda stanza: events.append('iq')))
+        self.xmpp.register_handler(Callback(
+            'Test Message 2', MatchXPath('{test}message/{test}body'),
+            lambda stanza: events.append('message 2')))
+
+        self.recv("""<message xmlns="test" id="test-id"><body /></message>""")
+        self.recv("""<iq xmlns="test" id="test-id" />""")
+        self.recv("""<presence xmlns="test" id="test-id" />""")
+
+        self.assertEqual(events, ['message', 'id', 'message 2',
+                                  'id', 'iq',
+                                  'id'])
+
+        self.assertTrue(self.xmpp.remove_handler('Test Id'))
+        del events[:]
+        self.recv("""<message xmlns="test" id="test-id"><body /></message>""")
+        self.assertEqual(events, ['message', 'message 2'])
+
+    def testStanzaPathByStanzaName(self):
+        """Test that stanza path handlers only see their kind of stanza."""
+        events = []
+
+        self.xmpp.register_handler(Callback(
+            'Test Groupchat', StanzaPath('message@type=groupchat'),
+            lambda stanza: events.append('groupchat')))
+        self.xmpp.register_handler(Callback(
+            'Test Get', StanzaPath('/iq@type=get'),
+            lambda stanza: events.append('get')))
+
+        self.recv("""<message type="groupchat"><body /></message>""")
+        self.recv("""<message type="chat"><body /></message>""")
+        self.recv("""<iq type="get" id="1" />""")
+        self.recv("""<presence type="get" />""")
+
+        self.assertEqual(events, ['groupchat', 'get'])
+        self.assertEqual(StanzaPath('/iq/register').stanza_names(),
+                         frozenset(('iq',)))
+
+    def testStanzaPathPluginFirst(self):
+        """Test stanza path handlers starting with a plugin name."""
+        self.xmpp.register_plugin('xep_0203')
+        events = []
+
+        self.xmpp.register_handler(Callback(
+            'Test Delay', StanzaPath('delay'),
+            lambda stanza: events.append(stanza.name)))
+
+        self.recv("""
+          <message>
+            <body />
+            <delay xmlns="urn:xmpp:delay" stamp="2002-09-10T23:08:25Z" />
+          </message>
+        """)
+        self.recv("""<message><body /></message>""")
+
+        self.assertEqual(events, ['message'])
+
+    def testMatchOnlyMatcher(self):
+        """Test a handler whose matcher only implements match()."""
+        events = []
+
+        class BodyMatcher:
+            def match(self, stanza):
+                return stanza.xml.find('{jabber:client}body') is not None
+
+        self.xmpp.register_handler(Callback(
+            'Test Body', BodyMatcher(),
+            lambda stanza: events.append(stanza.name)))
+
+        self.recv("""<message><body /></message>""")
+        self.recv("""<message><subject /></message>""")
+
+        self.assertEqual(events, ['message'])
+
 
 suite = unittest.TestLoader().loadTestsFromTestCase(TestHandlers)
@@ -0,0 +1,54 @@
+import unittest
+from slixmpp.test import SlixTest
+from slixmpp.xmlstream.xmlstream import SEND_BATCH_SIZE
+
+
+class TestStreamManagement(SlixTest):
+
+    def setUp(self):
+        self.stream_start(mode='client', plugins=['xep_0198'])
+        self.xmpp['xep_0198'].window = 1
+        self.xmpp['xep_0198'].window_counter = 1
+        self.xmpp['xep_0198'].enabled_out = True
+
+    def tearDown(self):
+        self.stream_close()
+
+    def sent_data(self):
+        """Return everything written to the stream so far."""
+        self.wait_for_send_queue()
+        sent = []
+        data = self.xmpp.socket.next_sent()
+        while data is not None:
+            sent.append(data.decode('utf-8'))
+            data = self.xmpp.socket.next_sent()
+        return sent
+
+    def testRequestAckOrder(self):
+        """Test that ack requests stay in place between batched stanzas."""
+        self.xmpp.send_message(mto='user@localhost', mbody='one')
+        self.xmpp.send_message(mto='user@localhost', mbody='two')
+
+        request = '<r xmlns="urn:xmpp:sm:3" />'
+        message = '<message to="user@localhost"><body>%s</body></message>'
+        self.assertEqual(self.sent_data(), [
+            request, message % 'one',
+            request, message % 'two',
+        ])
+
+    def testRequestAckOrderLargeBurst(self):
+        """Test that ack requests stay in place in bursts larger than a
+        send batch."""
+        count = 2 * SEND_BATCH_SIZE + 1
+        for i in range(count):
+            self.xmpp.send_message(mto='user@localhost', mbody=str(i))
+
+        request = '<r xmlns="urn:xmpp:sm:3" />'
+        message = '<message to="user@localhost"><body>%s</body></message>'
+        expected = []
+        for i in range(count):
+            expected.extend((request, message % i))
+        self.assertEqual(self.sent_data(), expected)
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestStreamManagement)